@@ -9,6 +9,7 @@ import threading
 import os
 import uuid
 import json
+import hmac
 from torchvision import transforms
 import socket
 import subprocess
@@ -18,7 +19,13 @@ from flask_socketio import SocketIO, emit, join_room
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 from services.s3 import upload_file_to_s3, create_presigned_get_url, download_s3_to_local
-from services.s3 import upload_file_to_s3, create_presigned_get_url, download_s3_to_local
+from services.clip_buffer import ClipRecorder
+from services.stream_reader import LatencyTracker
+from services.frame_sources import open_frame_source, FileSource
+from services.model_manager import ModelManager
+from services.rollups import RollupStore
+from services.inference_server import InferenceServer, PRIORITY_LIVE, PRIORITY_UPLOAD
+from services.roi import RoiStore
 # from services.livekit   <-- REMOVED
 
 # Patch for better async performance with Flask-SocketIO
@@ -33,11 +40,19 @@ RTMP_HOST = os.getenv('RTMP_HOST', 'localhost')
 RTMP_PORT = int(os.getenv('RTMP_PORT', 1935))
 RTMP_STREAM = os.getenv('RTMP_STREAM', 'dji')
 RTMP_URL = f"rtmp://{RTMP_HOST}:{RTMP_PORT}/{RTMP_STREAM}"
+# Drone loop input: stream URL, video file, image directory or synthetic://
+DRONE_SOURCE = os.getenv('DRONE_SOURCE', RTMP_URL)
+DRONE_REPLAY_SPEED = float(os.getenv('DRONE_REPLAY_SPEED', 1.0)) # 0 = as fast as possible
+DRONE_REPLAY_LOOP = os.getenv('DRONE_REPLAY_LOOP', '0') == '1'
 # LIVEKIT_INGRESS_URL Removed
+# Low-latency reader: no FFmpeg buffering, bounded open/read timeouts, fast reconnects
+STREAM_LOW_LATENCY = os.getenv('STREAM_LOW_LATENCY', '1') == '1'
 LIVE_MODE = 'direct_ingress' # Simplified for local stack
 MODEL_PATH = os.getenv('MODEL_PATH', "csrnet_pretrained.pth")
 UPLOAD_FOLDER = 'uploads' # Local temp folder
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+MODEL_FOLDER = os.path.abspath(os.getenv('MODEL_FOLDER', 'models')) # Only place hot-reload checkpoints are read from
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN') # Required as X-Admin-Token on admin endpoints; unset disables them
 
 # ----------------------
 # Device + Model Setup
@@ -93,12 +108,32 @@ socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 smoothed_count = None
 SMOOTHING_ALPHA = 0.3
 
-def process_frame_for_heatmap(frame):
+def preprocess_frame(frame, target_w=640, target_h=360):
+    """BGR frame -> normalised 1xCxHxW tensor on the inference device."""
+    # Resize for inference speed
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    rgb_resized = cv2.resize(rgb, (target_w, target_h))
+    return transform(rgb_resized).unsqueeze(0).to(device)
+
+def install_model(new_model):
+    """Publish a new live model; picked up by the next inference."""
+    global model
+    model = new_model
+
+inference_server = InferenceServer(lambda: model)
+roi_store = RoiStore(stream_ids=('drone',)) # Streams analysed by this backend
+model_manager = ModelManager(device, preprocess_frame, install_model, current=model, current_path=MODEL_PATH,
+                             live_infer_fn=lambda tensor: inference_server.infer(tensor, PRIORITY_UPLOAD),
+                             live_frame_fn=lambda: latest_drone_frame)
+
+def process_frame_for_heatmap(frame, priority=PRIORITY_LIVE, stream_id=None):
     """
-    Run CSRNet, get density map, and downsample for frontend grid.
+    Run CSRNet (via the shared inference server), get density map, and downsample for frontend grid.
+    `priority` orders requests from live streams ahead of uploads.
+    If `stream_id` has an ROI configured, only the crop is inferred and excluded areas are zeroed.
     Returns: (heatmap_grid_list, stats_dict)
     """
-    global model, device, smoothed_count
+    global smoothed_count
     
     # Defaults
     dummy_stats = {
@@ -111,18 +146,19 @@ def process_frame_for_heatmap(frame):
         return dummy_grid, dummy_stats
     
     try:
-        # Resize for inference speed
         target_w, target_h = 640, 360
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        rgb_resized = cv2.resize(rgb, (target_w, target_h))
-        
-        img_tensor = transform(rgb_resized).unsqueeze(0).to(device)
-        
-        with torch.no_grad():
-            density = model(img_tensor)
+        roi_plan = roi_store.plan(stream_id, target_w, target_h)
+        if roi_plan is not None:
+            # Same pixel scale as the full frame, but only over the region of interest
+            img_tensor = preprocess_frame(roi_plan.crop_frame(frame), roi_plan.input_w, roi_plan.input_h)
+        else:
+            img_tensor = preprocess_frame(frame, target_w, target_h)
         
-        density_map = density.squeeze().cpu().numpy()
+        # Batched with concurrent callers; only the server thread touches the model
+        density_map = inference_server.infer(img_tensor, priority)
         density_map = np.maximum(density_map, 0)
+        if roi_plan is not None:
+            density_map = roi_plan.place(density_map)
         
         # Scale count (CSRNet specific adjustment)
         total_count_raw = np.sum(density_map)
@@ -176,13 +212,29 @@ def check_tcp_connection(host, port, timeout=1.0):
     except Exception:
         return False
 
+# Critical-event clips: rolling per-stream buffer, encoded + uploaded off-thread
+def on_clip_ready(alert):
+    socketio.emit('alert:clip', alert, room='drone_feed')
+
+clip_recorder = ClipRecorder(on_clip_ready=on_clip_ready)
+
 # Drone Processing Job
+MIN_BACKOFF = 0.5 if STREAM_LOW_LATENCY else 5
+MAX_BACKOFF = 10 if STREAM_LOW_LATENCY else 40
+latency_tracker = LatencyTracker()
+rollups = RollupStore()
+DRONE_SESSION_GAP_SECONDS = float(os.getenv('DRONE_SESSION_GAP_SECONDS', 300)) # Outage that starts a new session
+drone_source = open_frame_source(DRONE_SOURCE, speed=DRONE_REPLAY_SPEED, loop=DRONE_REPLAY_LOOP,
+                                 low_latency=STREAM_LOW_LATENCY, sleep=socketio.sleep)
 drone_thread = None
+latest_drone_frame = None # Most recent frame, used as reference when validating a model swap
 drone_active = False
 drone_status_info = {
     "state": "initializing",
     "last_frame_ts": None,
     "rtmp_url": RTMP_URL,
+    "source": drone_source.describe(),
+    "session_id": None,
     "frames_received": 0,
     "error": None
 }
@@ -206,76 +258,96 @@ def run_ffprobe_check(url):
         return False
 
 def drone_processing_loop():
-    """Background task to read RTMP and emit analytics."""
-    global drone_active, drone_status_info
-    print(f"Starting Drone Processing Loop via {RTMP_URL}")
+    """Background task to read the drone frame source and emit analytics."""
+    global drone_active, drone_status_info, latest_drone_frame
+    print(f"Starting Drone Processing Loop via {drone_source.uri} (low latency: {STREAM_LOW_LATENCY})")
     
     # Exponential backoff parameters
-    backoff = 5
-    MAX_BACKOFF = 40
+    backoff = MIN_BACKOFF
     
-    cap = None
+    source = None
+    opened = False
     frame_count = 0
     start_time = time.time()
+    ffprobe_done = False # Only diagnose once per outage
     
     while drone_active:
       try:
-        # 1. Check if RTMP server is reachable
-        if not check_tcp_connection(RTMP_HOST, RTMP_PORT):
-             msg = f"RTMP server not reachable at {RTMP_HOST}:{RTMP_PORT}. Waiting {backoff}s..."
-             if drone_status_info["state"] != "waiting_for_server":
-                 print(f"[WARN] {msg}")
-             
-             drone_status_info["state"] = "waiting_for_server"
-             drone_status_info["error"] = "RTMP Server Unreachable"
-             
-             socketio.sleep(backoff)
-             backoff = min(backoff * 2, MAX_BACKOFF)
-             continue
-
-        # 2. Server is up, try to connect to stream
-        if cap is None or not cap.isOpened():
-             # Diagnostic: Check with ffprobe first if we failed previously
-             if drone_status_info["state"] == "connecting":
-                 run_ffprobe_check(RTMP_URL)
-
-             cap = cv2.VideoCapture(RTMP_URL)
-             if not cap.isOpened():
-                 if drone_status_info["state"] != "connecting":
-                     print(f"[DEBUG] RTMP stream {RTMP_URL} not ready yet. Retrying in {backoff}s...")
-                 
-                 drone_status_info["state"] = "connecting"
-                 drone_status_info["error"] = "Stream Not Ready"
+        # 0. Pick up a source swapped in through /api/stream/source
+        if source is not drone_source:
+             if source: source.release()
+             source = drone_source
+             opened = False
+             drone_status_info["session_id"] = None
+             drone_status_info["source"] = source.describe()
+
+        # 1. Try to connect to stream. The open timeout bounds this, so the
+        #    TCP probe is only used to explain a failure, not before every attempt.
+        if not opened:
+             opened = source.open()
+             if not opened:
+                 if not source.is_live:
+                     print(f"[ERROR] Could not open frame source {source.uri}")
+                     drone_status_info["state"] = "error"
+                     drone_status_info["error"] = "Source Not Readable"
+                     socketio.sleep(MAX_BACKOFF)
+                     continue
+
+                 host, port = source.endpoint()
+                 if not check_tcp_connection(host, port):
+                     if drone_status_info["state"] != "waiting_for_server":
+                         print(f"[WARN] Stream server not reachable at {host}:{port}. Waiting {backoff}s...")
+                     drone_status_info["state"] = "waiting_for_server"
+                     drone_status_info["error"] = "RTMP Server Unreachable"
+                 else:
+                     if drone_status_info["state"] != "connecting":
+                         print(f"[DEBUG] Stream {source.uri} not ready yet. Retrying in {backoff}s...")
+                     elif not ffprobe_done:
+                         # Diagnostic: Check with ffprobe if we failed previously
+                         run_ffprobe_check(source.uri)
+                         ffprobe_done = True
+                     drone_status_info["state"] = "connecting"
+                     drone_status_info["error"] = "Stream Not Ready"
                  
                  socketio.sleep(backoff)
                  backoff = min(backoff * 2, MAX_BACKOFF)
                  continue
              else:
-                 print(f"[INFO] Connected to RTMP stream: {RTMP_URL}")
-                 backoff = 5 # Reset backoff on success
+                 print(f"[INFO] Connected to frame source: {source.uri}")
+                 backoff = MIN_BACKOFF # Reset backoff on success
+                 ffprobe_done = False
+                 latency_tracker.reset_connection()
+                 last_ts = drone_status_info["last_frame_ts"]
+                 if drone_status_info["session_id"] is None or last_ts is None or time.time() - last_ts > DRONE_SESSION_GAP_SECONDS:
+                     drone_status_info["session_id"] = uuid.uuid4().hex
+                     print(f"[INFO] Started drone session {drone_status_info['session_id']}")
                  drone_status_info["state"] = "streaming"
                  drone_status_info["error"] = None
-                 # Attempt to read one frame to confirm
-                 success, frame = cap.read()
-                 if not success:
-                     print("[WARN] Connected but failed to read first frame.")
-                     cap.release()
-                     continue
-                 else:
-                     frame_count += 1
-                     drone_status_info["frames_received"] = frame_count
 
-        success, frame = cap.read()
-        if not success:
+        frame = source.read()
+        if frame is None:
+            source.release()
+            opened = False
+            if not source.is_live:
+                # Finite replay finished; idle until a new source is set
+                print(f"[INFO] Frame source {source.uri} finished.")
+                drone_status_info["state"] = "finished"
+                while drone_active and source is drone_source:
+                    socketio.sleep(1)
+                continue
             # Stream might have ended or interrupted
             drone_status_info["state"] = "interrupted"
             print(f"[WARN] Failed to read frame. Stream might be closed. Reconnecting...")
-            cap.release()
-            socketio.sleep(1)
+            socketio.sleep(MIN_BACKOFF)
             continue
         
+        capture_ts = frame.capture_ts
+        latency_tracker.on_capture(capture_ts, frame.stream_ts)
+        
         frame_count += 1
         drone_status_info["frames_received"] = frame_count
+        clip_recorder.push('drone', frame.image, capture_ts)
+        latest_drone_frame = frame.image
         
         if frame_count % 100 == 0:
             elapsed = time.time() - start_time
@@ -283,26 +355,38 @@ def drone_processing_loop():
             print(f"[DEBUG] Processed {frame_count} frames | FPS: {fps:.2f}")
 
         if frame_count % 3 == 0: # HEATMAP_INTERVAL
-            heatmap_grid, stats = process_frame_for_heatmap(frame)
+            heatmap_grid, stats = process_frame_for_heatmap(frame.image, PRIORITY_LIVE, stream_id='drone')
+            clip_recorder.update_overlay('drone', heatmap_grid)
+            if stats["globalRiskLevel"] == "critical":
+                alert = clip_recorder.trigger('drone', stats)
+                if alert:
+                    print(f"[WARN] Critical risk on drone feed. Recording clip {alert['alertId']}")
+                    socketio.emit('alert:critical', alert, room='drone_feed')
             # Emit to 'drone_feed' room
+            emit_ts = time.time()
             socketio.emit('analytics:update', {
                 'grid': heatmap_grid,
                 'stats': stats,
-                'timestamp': time.time() * 1000,
+                'timestamp': emit_ts * 1000,
+                'streamTs': frame.stream_ts, # Position in the stream (ms)
+                'captureTs': capture_ts * 1000, # Wall clock when the frame was read
+                'latencyMs': round((emit_ts - capture_ts) * 1000, 1),
                 'sourceType': 'drone'
             }, room='drone_feed')
+            latency_tracker.on_emit(capture_ts, emit_ts)
+            rollups.record('drone', drone_status_info["session_id"], stats, capture_ts)
             
         # Update status
         drone_status_info["last_frame_ts"] = time.time()
         
-        socketio.sleep(0.01) # Yield
+        socketio.sleep(0 if STREAM_LOW_LATENCY else 0.01) # Yield
       except Exception as e:
           print(f"[ERROR] Drone loop exception: {e}")
           traceback.print_exc()
           drone_status_info["error"] = str(e)
           socketio.sleep(5)
         
-    if cap: cap.release()
+    if source: source.release()
 
 # Uploaded Video Processing Logic
 def process_uploaded_video_job(filepath, video_id, client_id):
@@ -311,35 +395,36 @@ def process_uploaded_video_job(filepath, video_id, client_id):
     Deletes the local file upon completion.
     """
     print(f"Starting processing for video {video_id} at {filepath}")
-    cap = cv2.VideoCapture(filepath)
-    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    # Uploads are analysed as fast as possible; t_ms keeps them in sync with playback
+    source = FileSource(filepath, speed=0, sleep=socketio.sleep)
     
     HEATMAP_INTERVAL_FRAMES = 5
     processed_count = 0
+    room_name = f"video_{video_id}"
+    job_start = time.time() # Rollups are keyed on video time from here
     
-    while cap.isOpened():
-        success, frame = cap.read()
-        if not success:
-            break
+    if source.open():
+        while True:
+            frame = source.read()
+            if frame is None:
+                break
             
-        current_time_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+            if processed_count % HEATMAP_INTERVAL_FRAMES == 0:
+                heatmap_grid, stats = process_frame_for_heatmap(frame.image, PRIORITY_UPLOAD)
+                
+                # Emit event to specific room
+                socketio.emit('analytics:update', {
+                    't_ms': frame.stream_ts, # Sync key for frontend
+                    'grid': heatmap_grid,
+                    'stats': stats,
+                    'sourceType': 'upload'
+                }, room=room_name)
+                rollups.record('upload', video_id, stats, job_start + frame.stream_ts / 1000.0, per_stream=False)
+                
+            processed_count += 1
+            socketio.sleep(0.001) # Yield to event loop
         
-        if processed_count % HEATMAP_INTERVAL_FRAMES == 0:
-            heatmap_grid, stats = process_frame_for_heatmap(frame)
-            
-            # Emit event to specific room
-            room_name = f"video_{video_id}"
-            socketio.emit('analytics:update', {
-                't_ms': current_time_ms, # Sync key for frontend
-                'grid': heatmap_grid,
-                'stats': stats,
-                'sourceType': 'upload'
-            }, room=room_name)
-            
-        processed_count += 1
-        socketio.sleep(0.001) # Yield to event loop
-        
-    cap.release()
+    source.release()
     print(f"Finished processing video {video_id}")
     
     # Cleanup local temp file
@@ -371,7 +456,52 @@ def get_stream_info():
 @app.route('/api/stream/status', methods=['GET'])
 def get_stream_status():
     global drone_status_info
-    return jsonify(drone_status_info)
+    return jsonify(dict(drone_status_info, latency=latency_tracker.summary()))
+
+@app.route('/api/inference/status', methods=['GET'])
+def get_inference_status():
+    """
+    Micro-batching statistics of the shared inference server.
+    """
+    return jsonify(inference_server.stats())
+
+@app.route('/api/stream/roi', methods=['GET'])
+def list_stream_roi():
+    return jsonify(roi_store.all())
+
+@app.route('/api/stream/roi/<stream_id>', methods=['GET', 'PUT', 'DELETE'])
+def stream_roi(stream_id):
+    """
+    Region of interest for a stream (coordinates normalised to 0..1):
+    {"crop": [x, y, w, h], "exclude": [[[x, y], [x, y], [x, y]], ...]}
+    Only the crop is inferred; density inside exclusion polygons is zeroed.
+    Changes are admin only: a bad ROI can hide critical risk from every viewer.
+    """
+    if request.method != 'GET' and not is_admin_request():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if request.method == 'GET':
+        roi = roi_store.get(stream_id)
+        if roi is None:
+            return jsonify({'error': f'No ROI configured for {stream_id}'}), 404
+        return jsonify(roi)
+
+    if request.method == 'DELETE':
+        return jsonify({'success': roi_store.clear(stream_id)})
+
+    try:
+        roi = roi_store.set(stream_id, request.get_json(silent=True))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    print(f"[INFO] ROI for {stream_id} set to {roi}")
+    return jsonify({'success': True, 'roi': roi})
+
+@app.route('/api/clips/status', methods=['GET'])
+def get_clip_status():
+    """
+    Rolling clip buffer occupancy per stream.
+    """
+    return jsonify(clip_recorder.stats())
 
 @app.route('/api/rtmp/debug', methods=['GET'])
 def get_rtmp_debug():
@@ -387,6 +517,64 @@ def get_rtmp_debug():
         "timestamp": time.time()
     })
 
+@app.route('/api/stream/source', methods=['POST'])
+def set_drone_source():
+    """
+    Swap the frame source feeding the live pipeline, e.g. to replay a recording for load tests.
+    Body: {"uri": "...", "replaySpeed": 1.0, "loop": false}
+    Admin only: it replaces the feed every drone_feed viewer sees.
+    """
+    global drone_source
+    if not is_admin_request():
+        return jsonify({'error': 'Unauthorized'}), 401
+    data = request.get_json(silent=True) or {}
+    uri = data.get('uri') or RTMP_URL
+    try:
+        drone_source = open_frame_source(
+            uri,
+            speed=float(data.get('replaySpeed', DRONE_REPLAY_SPEED)),
+            loop=bool(data.get('loop', DRONE_REPLAY_LOOP)),
+            low_latency=STREAM_LOW_LATENCY,
+            sleep=socketio.sleep
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    print(f"[INFO] Drone frame source set to {uri}")
+    start_drone_thread()
+    return jsonify({'success': True, 'source': drone_source.describe()})
+
+@app.route('/api/analytics/rollups', methods=['GET'])
+def get_rollups():
+    """
+    Peak / mean / risk-duration summaries for a stream or session.
+    Query: streamId or sessionId, optional start, end (epoch seconds) and resolution (seconds).
+    Served from the coarsest rollup tier that covers the range at the requested resolution.
+    """
+    stream_id = request.args.get('streamId')
+    session_id = request.args.get('sessionId')
+    if not stream_id and not session_id:
+        return jsonify({'error': 'streamId or sessionId is required'}), 400
+
+    start = request.args.get('start', type=float)
+    end = request.args.get('end', type=float)
+    resolution = request.args.get('resolution', type=float)
+    if resolution is not None and resolution <= 0:
+        return jsonify({'error': 'resolution must be positive'}), 400
+
+    scope, scope_id = ('session', session_id) if session_id else ('stream', stream_id)
+    result = rollups.query(scope, scope_id, start=start, end=end, resolution=resolution)
+    if result is None:
+        return jsonify({'error': f'No analytics for {scope} {scope_id}'}), 404
+    return jsonify(result)
+
+@app.route('/api/analytics/sessions', methods=['GET'])
+def get_analytics_sessions():
+    """
+    All drone and upload sessions with whole-session summaries.
+    """
+    return jsonify(rollups.sessions())
+
 @app.route('/api/upload', methods=['POST'])
 def upload_video():
     """
@@ -444,6 +632,69 @@ def upload_video():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+def is_admin_request():
+    """Admin endpoints are disabled unless ADMIN_TOKEN is configured."""
+    if not ADMIN_TOKEN:
+        return False
+    token = request.headers.get('X-Admin-Token', '')
+    return hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
+def resolve_model_path(name):
+    """Absolute path for a checkpoint inside MODEL_FOLDER, or None if it points elsewhere."""
+    path = os.path.realpath(os.path.join(MODEL_FOLDER, name))
+    if os.path.commonpath([path, os.path.realpath(MODEL_FOLDER)]) != os.path.realpath(MODEL_FOLDER):
+        return None
+    return path
+
+@app.route('/api/admin/model/status', methods=['GET'])
+def get_model_status():
+    if not is_admin_request():
+        return jsonify({'error': 'Unauthorized'}), 401
+    return jsonify(model_manager.status)
+
+@app.route('/api/admin/model/reload', methods=['POST'])
+def reload_model():
+    """
+    Load a checkpoint (.pth state dict or TorchScript .pt) in the background,
+    warm it up, check it on the reference frame and swap it in.
+    Body: {"path": "<file in MODEL_FOLDER>"} or {"s3Key": "..."}, optional "referenceCount", "force".
+    """
+    if not is_admin_request():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    data = request.get_json(silent=True) or {}
+    fetch = None
+    if data.get('s3Key'):
+        s3_key = data['s3Key']
+        filename = secure_filename(os.path.basename(s3_key))
+        if not filename:
+            return jsonify({'error': 'Invalid s3Key'}), 400
+        path = os.path.join(MODEL_FOLDER, filename)
+
+        def fetch():
+            # Runs on the reload thread, not in this request
+            os.makedirs(MODEL_FOLDER, exist_ok=True)
+            download_s3_to_local(s3_key, path)
+    else:
+        path = resolve_model_path(data.get('path') or '')
+        if not path or not os.path.isfile(path):
+            return jsonify({'error': f'Checkpoint not found in {MODEL_FOLDER}'}), 400
+
+    if not model_manager.reload_async(path, expected_count=data.get('referenceCount'),
+                                      force=bool(data.get('force', False)), fetch_fn=fetch):
+        return jsonify({'error': 'A model reload is already in progress'}), 409
+
+    print(f"[INFO] Model reload started from {path}")
+    return jsonify({'success': True, 'status': model_manager.status}), 202
+
+@app.route('/api/admin/model/rollback', methods=['POST'])
+def rollback_model():
+    if not is_admin_request():
+        return jsonify({'error': 'Unauthorized'}), 401
+    if not model_manager.rollback():
+        return jsonify({'error': 'No previous model to roll back to'}), 409
+    return jsonify({'success': True, 'status': model_manager.status})
+
 @app.route('/api/analyze/start', methods=['POST'])
 def start_analysis():
     # Only needed if we want to restart analysis without re-uploading
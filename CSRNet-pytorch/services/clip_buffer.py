@@ -0,0 +1,295 @@
+import cv2
+import numpy as np
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from services.s3 import upload_file_to_s3, create_presigned_get_url
+
+logger = logging.getLogger(__name__)
+
+# Seconds of footage kept before / recorded after a critical event
+CLIP_PRE_SECONDS = float(os.getenv('CLIP_PRE_SECONDS', 10))
+CLIP_POST_SECONDS = float(os.getenv('CLIP_POST_SECONDS', 3))
+# Hard cap on compressed bytes held per stream
+CLIP_BUFFER_MAX_BYTES = int(float(os.getenv('CLIP_BUFFER_MAX_MB', 48)) * 1024 * 1024)
+CLIP_JPEG_QUALITY = int(os.getenv('CLIP_JPEG_QUALITY', 70))
+# Minimum gap between two clips of the same stream
+CLIP_COOLDOWN_SECONDS = float(os.getenv('CLIP_COOLDOWN_SECONDS', 30))
+CLIP_ENCODE_WORKERS = int(os.getenv('CLIP_ENCODE_WORKERS', 2))
+# Raw frames waiting for compression; extra frames are dropped, never waited on
+CLIP_MAX_PENDING = 4
+# Extra time allowed for post-event frames to arrive and be compressed
+CLIP_POST_GRACE_SECONDS = 2.0
+# Preferred first: H.264 plays in browser <video>, MPEG-4 Part 2 is the fallback
+CLIP_FOURCCS = ('avc1', 'H264', 'mp4v')
+
+
+class FrameRingBuffer:
+    """
+    Rolling buffer of JPEG-compressed frames for one stream.
+    Bounded both by age (max_seconds) and by total compressed size (max_bytes).
+    push() only enqueues the raw frame; compression happens on a worker thread
+    so the capture path never blocks on it.
+    """
+
+    def __init__(self, stream_id, max_seconds, max_bytes, jpeg_quality=CLIP_JPEG_QUALITY):
+        self.stream_id = stream_id
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.jpeg_quality = jpeg_quality
+
+        self._entries = deque()  # (ts, jpeg_bytes, overlay)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._arrived = threading.Condition(self._lock)
+        self._overlay = None
+        self._pending = queue.Queue(maxsize=CLIP_MAX_PENDING)
+        self.dropped = 0
+
+        self._worker = threading.Thread(target=self._compress_loop, daemon=True)
+        self._worker.start()
+
+    def push(self, frame, ts=None):
+        """Queue a raw BGR frame for buffering. Never blocks."""
+        try:
+            self._pending.put_nowait((ts or time.time(), frame, self._overlay))
+        except queue.Full:
+            self.dropped += 1
+
+    def set_overlay(self, grid, grid_w=60, grid_h=40):
+        """Attach the latest heatmap grid to frames pushed from now on."""
+        self._overlay = np.asarray(grid, dtype=np.float32).reshape(grid_h, grid_w)
+
+    def _compress_loop(self):
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality]
+        while True:
+            ts, frame, overlay = self._pending.get()
+            try:
+                ok, buf = cv2.imencode('.jpg', frame, params)
+                if not ok:
+                    continue
+                data = buf.tobytes()
+                with self._lock:
+                    self._entries.append((ts, data, overlay))
+                    self._bytes += len(data)
+                    self._evict(ts)
+                    self._arrived.notify_all()
+            except Exception as e:
+                logger.error(f"Clip buffer compression failed for {self.stream_id}: {e}")
+
+    def _evict(self, now):
+        # Caller holds self._lock
+        while self._entries and (
+            self._bytes > self.max_bytes or now - self._entries[0][0] > self.max_seconds
+        ):
+            _, data, _ = self._entries.popleft()
+            self._bytes -= len(data)
+
+    def wait_until(self, ts, timeout):
+        """Block until a frame at or after `ts` is buffered. Returns False on timeout."""
+        deadline = time.time() + timeout
+        with self._arrived:
+            while not self._entries or self._entries[-1][0] < ts:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._arrived.wait(remaining)
+            return True
+
+    def snapshot(self, since=None):
+        """Return buffered entries (oldest first), optionally only those newer than `since`."""
+        with self._lock:
+            if since is None:
+                return list(self._entries)
+            return [e for e in self._entries if e[0] > since]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "frames": len(self._entries),
+                "bytes": self._bytes,
+                "seconds": (self._entries[-1][0] - self._entries[0][0]) if self._entries else 0.0,
+                "dropped": self.dropped
+            }
+
+
+def draw_heatmap_overlay(frame, overlay, alpha=0.45):
+    """Blend a density grid onto a BGR frame using a JET colormap."""
+    if overlay is None:
+        return frame
+    h, w = frame.shape[:2]
+    peak = max(float(np.max(overlay)), 0.05)
+    norm = np.clip(overlay / peak, 0.0, 1.0)
+    heat = cv2.resize((norm * 255).astype(np.uint8), (w, h), interpolation=cv2.INTER_LINEAR)
+    colored = cv2.applyColorMap(heat, cv2.COLORMAP_JET)
+    blended = cv2.addWeighted(frame, 1.0 - alpha, colored, alpha, 0)
+    # Only tint cells that actually contain density
+    mask = heat > 10
+    out = frame.copy()
+    out[mask] = blended[mask]
+    return out
+
+
+_clip_fourcc = None  # First codec that opened; tried first on later clips
+
+
+def open_clip_writer(out_path, fps, size):
+    """Open an MP4 writer with the first available codec in CLIP_FOURCCS."""
+    global _clip_fourcc
+    candidates = ([_clip_fourcc] if _clip_fourcc else []) + [c for c in CLIP_FOURCCS if c != _clip_fourcc]
+    for fourcc in candidates:
+        writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+        if writer.isOpened():
+            if fourcc != _clip_fourcc:
+                logger.info(f"Encoding clips with {fourcc}")
+                _clip_fourcc = fourcc
+            return writer
+        writer.release()
+    raise RuntimeError(f"could not open a video writer for {out_path} (tried {', '.join(CLIP_FOURCCS)})")
+
+
+def encode_clip(entries, out_path):
+    """Decode buffered JPEGs, draw the heatmap overlay and write an MP4. Returns frame count."""
+    if not entries:
+        return 0
+
+    duration = entries[-1][0] - entries[0][0]
+    fps = (len(entries) - 1) / duration if duration > 0 else 15.0
+    fps = float(min(max(fps, 1.0), 60.0))
+
+    writer = None
+    size = None
+    written = 0
+    try:
+        for _, data, overlay in entries:
+            frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                continue
+            if writer is None:
+                size = (frame.shape[1], frame.shape[0])
+                writer = open_clip_writer(out_path, fps, size)
+            elif (frame.shape[1], frame.shape[0]) != size:
+                frame = cv2.resize(frame, size)
+            writer.write(draw_heatmap_overlay(frame, overlay))
+            written += 1
+    finally:
+        if writer is not None:
+            writer.release()
+    return written
+
+
+class ClipRecorder:
+    """
+    Owns one FrameRingBuffer per stream and turns critical-risk events into
+    uploaded MP4 clips. Encoding and upload run on a thread pool; on_clip_ready
+    is called from that pool with the clip metadata once the upload finishes.
+    """
+
+    def __init__(self, on_clip_ready=None,
+                 pre_seconds=CLIP_PRE_SECONDS, post_seconds=CLIP_POST_SECONDS,
+                 max_bytes=CLIP_BUFFER_MAX_BYTES, cooldown=CLIP_COOLDOWN_SECONDS):
+        self.on_clip_ready = on_clip_ready
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.max_bytes = max_bytes
+        self.cooldown = cooldown
+
+        self._buffers = {}
+        self._last_trigger = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=CLIP_ENCODE_WORKERS, thread_name_prefix='clip-encoder')
+
+    def buffer_for(self, stream_id):
+        with self._lock:
+            buf = self._buffers.get(stream_id)
+            if buf is None:
+                # Keep enough history to cover pre + post even while a clip is pending
+                buf = FrameRingBuffer(stream_id, self.pre_seconds + self.post_seconds + 1.0, self.max_bytes)
+                self._buffers[stream_id] = buf
+            return buf
+
+    def push(self, stream_id, frame, ts=None):
+        self.buffer_for(stream_id).push(frame, ts)
+
+    def update_overlay(self, stream_id, grid):
+        self.buffer_for(stream_id).set_overlay(grid)
+
+    def trigger(self, stream_id, stats, client_id='drone'):
+        """
+        Start a clip for a critical event. Returns the alert dict (with the clip
+        key it will be uploaded under) or None when the stream is cooling down.
+        """
+        now = time.time()
+        with self._lock:
+            last = self._last_trigger.get(stream_id)
+            if last is not None and now - last < self.cooldown:
+                return None
+            self._last_trigger[stream_id] = now
+
+        alert_id = uuid.uuid4().hex
+        s3_key = f"clients/{client_id}/clips/{stream_id}/{alert_id}.mp4"
+        alert = {
+            "alertId": alert_id,
+            "streamId": stream_id,
+            "timestamp": now * 1000,
+            "stats": stats,
+            "clipKey": s3_key,
+            "clipStatus": "recording"
+        }
+
+        pre_entries = [e for e in self.buffer_for(stream_id).snapshot() if e[0] >= now - self.pre_seconds]
+        self._executor.submit(self._record_and_upload, alert, pre_entries, now)
+        return alert
+
+    def _record_and_upload(self, alert, pre_entries, event_ts):
+        stream_id = alert["streamId"]
+        tmp_path = None
+        try:
+            # Wait for the end of the post window to be compressed, not just captured
+            post_end = event_ts + self.post_seconds
+            if not self.buffer_for(stream_id).wait_until(post_end, self.post_seconds + CLIP_POST_GRACE_SECONDS):
+                logger.warning(f"Clip {alert['alertId']}: post-event window incomplete, encoding what arrived")
+            last_ts = pre_entries[-1][0] if pre_entries else event_ts - self.pre_seconds
+            post_entries = [
+                e for e in self.buffer_for(stream_id).snapshot(since=last_ts)
+                if e[0] <= post_end
+            ]
+            entries = pre_entries + post_entries
+
+            fd, tmp_path = tempfile.mkstemp(suffix='.mp4')
+            os.close(fd)
+            written = encode_clip(entries, tmp_path)
+            if written == 0:
+                raise RuntimeError("no buffered frames to encode")
+
+            with open(tmp_path, 'rb') as f:
+                s3_uri = upload_file_to_s3(f, alert["clipKey"], 'video/mp4')
+
+            alert = dict(alert, clipStatus="ready", clipUri=s3_uri,
+                         clipUrl=create_presigned_get_url(alert["clipKey"], expiration=3600*24),
+                         clipFrames=written)
+            logger.info(f"Clip {alert['alertId']} uploaded ({written} frames) to {s3_uri}")
+        except Exception as e:
+            logger.error(f"Clip {alert['alertId']} failed: {e}")
+            alert = dict(alert, clipStatus="failed", error=str(e))
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        if self.on_clip_ready:
+            try:
+                self.on_clip_ready(alert)
+            except Exception as e:
+                logger.error(f"Clip callback failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            buffers = dict(self._buffers)
+        return {sid: buf.stats() for sid, buf in buffers.items()}
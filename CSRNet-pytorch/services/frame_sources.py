@@ -0,0 +1,264 @@
+import cv2
+import numpy as np
+import os
+import time
+import logging
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from urllib.parse import urlparse, parse_qs
+
+from services.stream_reader import open_capture, open_file_capture
+
+logger = logging.getLogger(__name__)
+
+# image: BGR ndarray, stream_ts: position in the source (ms),
+# capture_ts: wall clock (s) at which the frame became available
+Frame = namedtuple('Frame', ['image', 'stream_ts', 'capture_ts'])
+
+STREAM_SCHEMES = ('rtmp', 'rtmps', 'rtsp', 'rtsps', 'srt', 'http', 'https')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class FrameSource(ABC):
+    """
+    Common interface for everything that produces frames for analysis.
+
+    open() -> bool, read() -> Frame or None, release().
+    Live sources may fail read() transiently and should be reopened by the
+    caller; finite sources return None once they are exhausted.
+
+    Non-live sources are paced against their own timestamps: speed=1.0 plays
+    in real time, speed=N plays N times faster, speed=0 reads as fast as
+    possible. capture_ts is the wall time a live feed would have delivered
+    the frame at, so latency metrics stay meaningful during replay.
+    """
+
+    kind = 'base'
+    is_live = False
+
+    def __init__(self, uri, speed=1.0, loop=False, sleep=time.sleep):
+        self.uri = uri
+        self.speed = speed
+        self.loop = loop
+        self._sleep = sleep
+        self._wall_start = None
+        self._ts_offset = 0.0  # ms added to timestamps after each loop
+
+    @abstractmethod
+    def open(self):
+        """Prepare the source; returns True on success."""
+
+    @abstractmethod
+    def read(self):
+        """Next Frame, or None if unavailable / exhausted."""
+
+    def release(self):
+        pass
+
+    def describe(self):
+        return {"kind": self.kind, "uri": self.uri, "speed": self.speed, "loop": self.loop}
+
+    def _pace(self, stream_ts):
+        """Sleep until the frame at stream_ts is due; return its capture wall time."""
+        now = time.time()
+        if self._wall_start is None:
+            self._wall_start = now - stream_ts / 1000.0 / (self.speed or 1.0)
+        if not self.speed:
+            return now
+        due = self._wall_start + stream_ts / 1000.0 / self.speed
+        if due > now:
+            self._sleep(due - now)
+            return due
+        return now
+
+
+class StreamSource(FrameSource):
+    """RTMP/RTSP/SRT/HLS stream, e.g. served by MediaMTX."""
+
+    kind = 'stream'
+    is_live = True
+
+    def __init__(self, uri, low_latency=True, **kwargs):
+        super().__init__(uri, **kwargs)
+        self.low_latency = low_latency
+        self.cap = None
+
+    def open(self):
+        self.release()
+        self.cap = open_capture(self.uri, low_latency=self.low_latency)
+        if not self.cap.isOpened():
+            self.release()
+            return False
+        return True
+
+    def read(self):
+        if self.cap is None:
+            return None
+        success, image = self.cap.read()
+        capture_ts = time.time()
+        if not success:
+            return None
+        return Frame(image, self.cap.get(cv2.CAP_PROP_POS_MSEC), capture_ts)
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def endpoint(self):
+        """(host, port) of the media server, used to explain connection failures."""
+        parsed = urlparse(self.uri)
+        default_ports = {'rtmp': 1935, 'rtmps': 443, 'rtsp': 8554, 'rtsps': 8322,
+                         'http': 80, 'https': 443}
+        return parsed.hostname, parsed.port or default_ports.get(parsed.scheme)
+
+
+class FileSource(FrameSource):
+    """Local video file, replayed at `speed` using its own timestamps."""
+
+    kind = 'file'
+
+    def __init__(self, uri, **kwargs):
+        super().__init__(uri, **kwargs)
+        self.cap = None
+        self.fps = 30.0
+        self._last_ts = 0.0
+
+    def open(self):
+        self.release()
+        self.cap = open_file_capture(self.uri)
+        if not self.cap.isOpened():
+            self.release()
+            return False
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        return True
+
+    def read(self):
+        if self.cap is None:
+            return None
+        success, image = self.cap.read()
+        if not success:
+            if not self.loop or not self.open():
+                return None
+            # Keep timestamps monotonic across loops
+            self._ts_offset = self._last_ts + 1000.0 / self.fps
+            success, image = self.cap.read()
+            if not success:
+                return None
+        stream_ts = self._ts_offset + self.cap.get(cv2.CAP_PROP_POS_MSEC)
+        self._last_ts = stream_ts
+        return Frame(image, stream_ts, self._pace(stream_ts))
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class ImageDirSource(FrameSource):
+    """Directory of still images played back in name order at a fixed fps."""
+
+    kind = 'images'
+
+    def __init__(self, uri, fps=10.0, **kwargs):
+        super().__init__(uri, **kwargs)
+        self.fps = fps
+        self._files = []
+        self._index = 0
+
+    def open(self):
+        self._files = sorted(
+            os.path.join(self.uri, name) for name in os.listdir(self.uri)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self._index = 0
+        return bool(self._files)
+
+    def read(self):
+        while True:
+            if self._index >= len(self._files):
+                if not self.loop or not self._files:
+                    return None
+                self._ts_offset += len(self._files) * 1000.0 / self.fps
+                self._index = 0
+            path = self._files[self._index]
+            stream_ts = self._ts_offset + self._index * 1000.0 / self.fps
+            self._index += 1
+            image = cv2.imread(path)
+            if image is None:
+                logger.warning(f"Skipping unreadable image {path}")
+                continue
+            return Frame(image, stream_ts, self._pace(stream_ts))
+
+
+class SyntheticSource(FrameSource):
+    """
+    Generated frames with moving blobs standing in for people.
+    Needs no drone, media server or files; `duration` (s) of None runs forever.
+    """
+
+    kind = 'synthetic'
+
+    def __init__(self, uri='synthetic://', width=1280, height=720, fps=25.0,
+                 people=200, duration=None, seed=0, **kwargs):
+        super().__init__(uri, **kwargs)
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = float(fps)
+        self.people = int(people)
+        self.duration = duration
+        self.seed = seed
+        self._index = 0
+
+    def open(self):
+        rng = np.random.default_rng(self.seed)
+        self._pos = rng.uniform([0, 0], [self.width, self.height], size=(self.people, 2))
+        self._vel = rng.normal(0, 2.0, size=(self.people, 2))
+        self._background = np.full((self.height, self.width, 3), 90, dtype=np.uint8)
+        self._index = 0
+        return True
+
+    def read(self):
+        stream_ts = self._index * 1000.0 / self.fps
+        if self.duration is not None and stream_ts >= self.duration * 1000.0:
+            return None
+        self._index += 1
+
+        self._pos = (self._pos + self._vel) % [self.width, self.height]
+        image = self._background.copy()
+        for x, y in self._pos.astype(int):
+            cv2.circle(image, (int(x), int(y)), 6, (40, 40, 160), -1)
+        return Frame(image, stream_ts, self._pace(stream_ts))
+
+
+def open_frame_source(uri, speed=1.0, loop=False, low_latency=True, sleep=time.sleep):
+    """
+    Build a FrameSource from a URI:
+      rtmp://, rtsp://, srt://, http(s)://...m3u8  -> StreamSource
+      synthetic://?fps=25&people=300&width=1280   -> SyntheticSource
+      path to a directory                          -> ImageDirSource
+      path to a file                               -> FileSource
+    The source is returned unopened.
+    """
+    parsed = urlparse(uri)
+    common = dict(speed=speed, loop=loop, sleep=sleep)
+
+    if parsed.scheme == 'synthetic':
+        params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        return SyntheticSource(
+            uri,
+            width=int(params.get('width', 1280)),
+            height=int(params.get('height', 720)),
+            fps=float(params.get('fps', 25)),
+            people=int(params.get('people', 200)),
+            duration=float(params['duration']) if 'duration' in params else None,
+            seed=int(params.get('seed', 0)),
+            **common
+        )
+    if parsed.scheme in STREAM_SCHEMES:
+        return StreamSource(uri, low_latency=low_latency, **common)
+    if os.path.isdir(uri):
+        return ImageDirSource(uri, **common)
+    if os.path.isfile(uri):
+        return FileSource(uri, **common)
+    raise ValueError(f"Unsupported frame source: {uri}")
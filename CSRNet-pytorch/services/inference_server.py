@@ -0,0 +1,138 @@
+import os
+import queue
+import threading
+import time
+import itertools
+import logging
+from concurrent.futures import Future
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_MAX_BATCH = int(os.getenv('INFERENCE_MAX_BATCH', 8))
+INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', 5))
+
+# Lower value is served first
+PRIORITY_LIVE = 0
+PRIORITY_UPLOAD = 1
+
+
+class InferenceServer:
+    """
+    Single owner of the model. Callers submit preprocessed 1xCxHxW tensors
+    and get a Future resolving to the HxW density map (numpy, on the CPU).
+
+    A worker thread takes the highest-priority request. Live requests are
+    batched only with other live requests already queued and run at once;
+    upload requests keep collecting until max_batch_size or max_wait_ms, and
+    stop early if a live request arrives. One forward pass runs per input
+    shape in the batch. model_getter is called once per batch, so a
+    hot-swapped model takes effect between batches.
+    """
+
+    def __init__(self, model_getter, max_batch_size=INFERENCE_MAX_BATCH, max_wait_ms=INFERENCE_MAX_WAIT_MS):
+        self.model_getter = model_getter
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()  # FIFO within a priority
+        self._stats_lock = threading.Lock()
+        self._stats = {"batches": 0, "requests": 0, "forwardPasses": 0, "lastBatchMs": None}
+
+        self._worker = threading.Thread(target=self._serve, name='inference-server', daemon=True)
+        self._worker.start()
+
+    def submit(self, tensor, priority=PRIORITY_UPLOAD):
+        future = Future()
+        self._queue.put((priority, next(self._seq), tensor, future))
+        return future
+
+    def infer(self, tensor, priority=PRIORITY_UPLOAD, timeout=None):
+        """Blocking helper: submit and wait for the density map."""
+        return self.submit(tensor, priority).result(timeout=timeout)
+
+    def _collect(self):
+        head = self._queue.get()
+        batch = [head]
+
+        if head[0] == PRIORITY_LIVE:
+            # Live requests run in their own pass and never wait: take only
+            # other live requests that are already queued
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item[0] != PRIORITY_LIVE:
+                    self._queue.put(item)
+                    break
+                batch.append(item)
+            return batch
+
+        deadline = time.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    # Past the deadline: only take what is already queued
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] == PRIORITY_LIVE:
+                # Stop gathering uploads; the live request goes next, on its own
+                self._queue.put(item)
+                break
+            batch.append(item)
+        return batch
+
+    def _serve(self):
+        while True:
+            batch = self._collect()
+            t0 = time.time()
+            net = self.model_getter()
+
+            # Inputs of different sizes cannot share a forward pass
+            groups = {}
+            for _, _, tensor, future in batch:
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault(tuple(tensor.shape[1:]), []).append((tensor, future))
+
+            passes = 0
+            for items in groups.values():
+                futures = [f for _, f in items]
+                if net is None:
+                    for f in futures:
+                        f.set_exception(RuntimeError("no model loaded"))
+                    continue
+                try:
+                    inputs = torch.cat([t for t, _ in items], dim=0)
+                    with torch.no_grad():
+                        density = net(inputs)
+                    density = density[:, 0].float().cpu().numpy()
+                    passes += 1
+                    for i, f in enumerate(futures):
+                        f.set_result(density[i])
+                except Exception as e:
+                    logger.error(f"Inference batch failed: {e}")
+                    for f in futures:
+                        if not f.done():
+                            f.set_exception(e)
+
+            with self._stats_lock:
+                self._stats["batches"] += 1
+                self._stats["requests"] += len(batch)
+                self._stats["forwardPasses"] += passes
+                self._stats["lastBatchMs"] = round((time.time() - t0) * 1000, 1)
+
+    def stats(self):
+        with self._stats_lock:
+            out = dict(self._stats)
+        out["meanBatchSize"] = round(out["requests"] / out["batches"], 2) if out["batches"] else None
+        out["queueDepth"] = self._queue.qsize()
+        out["maxBatchSize"] = self.max_batch_size
+        out["maxWaitMs"] = self.max_wait * 1000
+        return out
@@ -0,0 +1,195 @@
+import cv2
+import numpy as np
+import os
+import threading
+import time
+import logging
+import torch
+
+from model import CSRNet
+
+logger = logging.getLogger(__name__)
+
+# Reference frame used to sanity-check a candidate before it goes live.
+# Without it, a recent live frame is used; with neither, swaps need force.
+MODEL_REFERENCE_FRAME = os.getenv('MODEL_REFERENCE_FRAME')
+MODEL_WARMUP_RUNS = int(os.getenv('MODEL_WARMUP_RUNS', 3))
+# Max relative count difference vs the live model on the reference frame
+MODEL_MAX_COUNT_DELTA = float(os.getenv('MODEL_MAX_COUNT_DELTA', 0.5))
+
+# Files loaded with torch.jit.load instead of as a CSRNet state dict
+SCRIPTED_EXTENSIONS = ('.pt', '.ts', '.jit')
+
+
+def load_checkpoint(path, device):
+    """
+    Build a model from a CSRNet state dict (.pth) or a TorchScript artifact.
+    Weights are read on the CPU first so the live device is only touched by the final copy.
+    """
+    if path.endswith(SCRIPTED_EXTENSIONS):
+        net = torch.jit.load(path, map_location='cpu')
+    else:
+        # load_weights=True skips the VGG16 download; every weight is overwritten below
+        net = CSRNet(load_weights=True)
+        state = torch.load(path, map_location='cpu')
+        net.load_state_dict(state)
+    net.eval()
+    return net.to(device)
+
+
+class ModelManager:
+    """
+    Loads, validates and swaps model weights in the background.
+
+    The live model is a single reference; install_fn is called with the new
+    model to publish it (a plain reference assignment, so an inference that is
+    already running finishes on the model it started with). The previously
+    live model is kept for rollback.
+    """
+
+    def __init__(self, device, preprocess_fn, install_fn, current=None, current_path=None,
+                 live_infer_fn=None, live_frame_fn=None):
+        self.device = device
+        self.preprocess_fn = preprocess_fn
+        self.install_fn = install_fn
+        # Runs the live model without touching it from this thread (e.g. via the inference server)
+        self.live_infer_fn = live_infer_fn
+        # Returns a recent BGR frame from a live stream, or None
+        self.live_frame_fn = live_frame_fn
+        self.current = current
+        self.previous = None
+        self._lock = threading.Lock()
+        self._loading = False
+        self.status = {
+            "state": "ready" if current is not None else "empty",
+            "current": {"path": current_path, "version": 1 if current is not None else 0, "loadedAt": time.time()},
+            "previous": None,
+            "lastAttempt": None
+        }
+
+    def reload_async(self, path, expected_count=None, force=False, fetch_fn=None):
+        """
+        Start loading `path` on a background thread. fetch_fn, if given, runs first on
+        that thread (e.g. to download the checkpoint). Returns False if a load is already running.
+        """
+        with self._lock:
+            if self._loading:
+                return False
+            self._loading = True
+            self.status["state"] = "loading"
+            self.status["lastAttempt"] = {"path": path, "startedAt": time.time()}
+
+        thread = threading.Thread(target=self._reload, args=(path, expected_count, force, fetch_fn), daemon=True)
+        thread.start()
+        return True
+
+    def _reload(self, path, expected_count, force, fetch_fn):
+        attempt = self.status["lastAttempt"]
+        try:
+            t0 = time.time()
+            if fetch_fn is not None:
+                fetch_fn()
+                attempt["fetchSeconds"] = round(time.time() - t0, 3)
+                t0 = time.time()
+            candidate = load_checkpoint(path, self.device)
+            attempt["loadSeconds"] = round(time.time() - t0, 3)
+
+            self.status["state"] = "validating"
+            frame, source = self._reference_frame()
+            attempt["referenceSource"] = source
+            if frame is None:
+                if not force:
+                    raise ValueError("no reference frame (set MODEL_REFERENCE_FRAME or wait for a live frame); "
+                                     "pass force to swap without validation")
+                # Forced swap: still warm up, but there is nothing meaningful to compare on
+                frame = np.full((360, 640, 3), 127, dtype=np.uint8)
+            reference = self.preprocess_fn(frame)
+            with torch.no_grad():
+                for _ in range(MODEL_WARMUP_RUNS):
+                    candidate(reference)
+                t0 = time.time()
+                candidate_count = self._count(candidate(reference).squeeze().float().cpu().numpy())
+                attempt["inferenceMs"] = round((time.time() - t0) * 1000, 1)
+            live_count = self._live_count(reference) if self.current is not None else None
+
+            attempt["candidateCount"] = candidate_count
+            attempt["liveCount"] = live_count
+            self._validate(candidate_count, live_count, expected_count, force)
+
+            self._install(candidate, path)
+            attempt["result"] = "swapped"
+            logger.info(f"Model swapped to {path} (count on reference: {candidate_count:.1f})")
+        except Exception as e:
+            logger.error(f"Model reload from {path} failed: {e}")
+            attempt["result"] = "failed"
+            attempt["error"] = str(e)
+            self.status["state"] = "ready" if self.current is not None else "empty"
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def _reference_frame(self):
+        """(frame, source label): MODEL_REFERENCE_FRAME first, then a recent live frame."""
+        if MODEL_REFERENCE_FRAME:
+            frame = cv2.imread(MODEL_REFERENCE_FRAME)
+            if frame is not None:
+                return frame, MODEL_REFERENCE_FRAME
+            logger.warning(f"Reference frame {MODEL_REFERENCE_FRAME} unreadable")
+        if self.live_frame_fn is not None:
+            frame = self.live_frame_fn()
+            if frame is not None:
+                return frame, "live"
+        return None, None
+
+    def _live_count(self, tensor):
+        if self.live_infer_fn is not None:
+            return self._count(self.live_infer_fn(tensor))
+        with torch.no_grad():
+            return self._count(self.current(tensor).squeeze().float().cpu().numpy())
+
+    @staticmethod
+    def _count(density):
+        if not np.all(np.isfinite(density)):
+            raise ValueError("model produced non-finite density values")
+        return float(np.sum(np.maximum(density, 0)) / 100.0)
+
+    @staticmethod
+    def _validate(candidate_count, live_count, expected_count, force):
+        if force:
+            return
+        if expected_count is not None:
+            reference, label = float(expected_count), "expected"
+        elif live_count is not None:
+            reference, label = live_count, "live model"
+        else:
+            return
+        delta = abs(candidate_count - reference) / max(reference, 1.0)
+        if delta > MODEL_MAX_COUNT_DELTA:
+            raise ValueError(
+                f"reference count {candidate_count:.1f} differs from {label} ({reference:.1f}) "
+                f"by {delta:.0%}; pass force to swap anyway"
+            )
+
+    def _install(self, candidate, path):
+        with self._lock:
+            self.previous, self.current = self.current, candidate
+            self.install_fn(candidate)
+            self.status["previous"] = self.status["current"]
+            self.status["current"] = {
+                "path": path,
+                "version": (self.status["current"]["version"] or 0) + 1,
+                "loadedAt": time.time()
+            }
+            self.status["state"] = "ready"
+
+    def rollback(self):
+        """Swap the previous model back in. Returns False if there is nothing to roll back to."""
+        with self._lock:
+            if self.previous is None or self._loading:
+                return False
+            self.previous, self.current = self.current, self.previous
+            self.install_fn(self.current)
+            self.status["previous"], self.status["current"] = self.status["current"], self.status["previous"]
+            self.status["state"] = "ready"
+        logger.info(f"Model rolled back to {self.status['current']['path']}")
+        return True
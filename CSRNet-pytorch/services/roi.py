@@ -0,0 +1,196 @@
+import cv2
+import numpy as np
+import json
+import math
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Optional JSON file the per-stream ROI config is loaded from and saved to
+ROI_CONFIG_PATH = os.getenv('ROI_CONFIG_PATH')
+
+# CSRNet output is 1/8 of the input resolution
+DENSITY_STRIDE = 8
+
+
+def parse_roi(data):
+    """
+    Validate an ROI config. All coordinates are normalised to 0..1 of the frame.
+      {"crop": [x, y, w, h] | null, "exclude": [[[x, y], [x, y], [x, y], ...], ...]}
+    Raises ValueError on malformed input.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("ROI config must be an object")
+
+    crop = data.get('crop')
+    if crop is not None:
+        if not isinstance(crop, (list, tuple)) or len(crop) != 4:
+            raise ValueError("crop must be [x, y, w, h]")
+        x, y, w, h = (float(v) for v in crop)
+        if not (0 <= x < 1 and 0 <= y < 1 and w > 0 and h > 0):
+            raise ValueError("crop must lie within the frame and have positive size")
+        crop = [x, y, min(w, 1 - x), min(h, 1 - y)]
+
+    exclude = []
+    for polygon in data.get('exclude') or []:
+        if not isinstance(polygon, (list, tuple)) or len(polygon) < 3:
+            raise ValueError("each exclusion polygon needs at least 3 points")
+        points = []
+        for point in polygon:
+            px, py = (float(v) for v in point)
+            if not (0 <= px <= 1 and 0 <= py <= 1):
+                raise ValueError("exclusion points must be within 0..1")
+            points.append([px, py])
+        exclude.append(points)
+
+    return {"crop": crop, "exclude": exclude}
+
+
+class RoiPlan:
+    """
+    Inference plan for one stream at a given inference resolution.
+
+    The crop is snapped outward to the density stride so the crop's density
+    map lands exactly on the full-frame density canvas. `weights` is the
+    fraction of each density cell that is not excluded (0 outside the crop).
+    """
+
+    def __init__(self, roi, target_w, target_h):
+        self.target_w = target_w
+        self.target_h = target_h
+        cells_w = target_w // DENSITY_STRIDE
+        cells_h = target_h // DENSITY_STRIDE
+
+        crop = roi.get("crop") or [0.0, 0.0, 1.0, 1.0]
+        x, y, w, h = crop
+        self.cx0 = min(int(math.floor(x * cells_w)), cells_w - 1)
+        self.cy0 = min(int(math.floor(y * cells_h)), cells_h - 1)
+        self.cx1 = max(int(math.ceil((x + w) * cells_w)), self.cx0 + 1)
+        self.cy1 = max(int(math.ceil((y + h) * cells_h)), self.cy0 + 1)
+        self.cx1 = min(self.cx1, cells_w)
+        self.cy1 = min(self.cy1, cells_h)
+
+        # Size of the inference input for the cropped region
+        self.input_w = (self.cx1 - self.cx0) * DENSITY_STRIDE
+        self.input_h = (self.cy1 - self.cy0) * DENSITY_STRIDE
+        self.is_full_frame = (self.cx0, self.cy0, self.cx1, self.cy1) == (0, 0, cells_w, cells_h)
+
+        # Keep-weights on the density canvas: rasterise at input resolution, then area-average
+        keep = np.zeros((target_h, target_w), dtype=np.uint8)
+        keep[self.cy0 * DENSITY_STRIDE:self.cy1 * DENSITY_STRIDE,
+             self.cx0 * DENSITY_STRIDE:self.cx1 * DENSITY_STRIDE] = 255
+        for polygon in roi.get("exclude") or []:
+            pts = np.array([[px * target_w, py * target_h] for px, py in polygon], dtype=np.int32)
+            cv2.fillPoly(keep, [pts], 0)
+        self.weights = cv2.resize(keep.astype(np.float32) / 255.0, (cells_w, cells_h), interpolation=cv2.INTER_AREA)
+        self.has_mask = bool(roi.get("exclude"))
+
+    def crop_frame(self, frame):
+        """Pixel region of the source frame that covers the (snapped) crop."""
+        if self.is_full_frame:
+            return frame
+        h, w = frame.shape[:2]
+        sx = w / float(self.target_w)
+        sy = h / float(self.target_h)
+        x0 = int(round(self.cx0 * DENSITY_STRIDE * sx))
+        y0 = int(round(self.cy0 * DENSITY_STRIDE * sy))
+        x1 = max(int(round(self.cx1 * DENSITY_STRIDE * sx)), x0 + 1)
+        y1 = max(int(round(self.cy1 * DENSITY_STRIDE * sy)), y0 + 1)
+        return frame[y0:y1, x0:x1]
+
+    def place(self, density):
+        """Put the crop's density map on the full-frame canvas and zero excluded areas."""
+        if self.is_full_frame and density.shape == self.weights.shape:
+            canvas = density
+        else:
+            canvas = np.zeros_like(self.weights)
+            dh = min(density.shape[0], self.cy1 - self.cy0)
+            dw = min(density.shape[1], self.cx1 - self.cx0)
+            canvas[self.cy0:self.cy0 + dh, self.cx0:self.cx0 + dw] = density[:dh, :dw]
+        if self.has_mask or not self.is_full_frame:
+            canvas = canvas * self.weights
+        return canvas
+
+
+class RoiStore:
+    """Per-stream ROI configs with cached inference plans."""
+
+    def __init__(self, stream_ids, path=ROI_CONFIG_PATH):
+        # Only streams the backend actually analyses can be configured
+        self.stream_ids = frozenset(stream_ids)
+        self.path = path
+        self._configs = {}
+        self._plans = {}
+        self._lock = threading.Lock()
+        # Serialises file writes; the disk write itself runs outside self._lock
+        self._save_lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                raw = json.load(f)
+            self._configs = {
+                stream_id: parse_roi(cfg) for stream_id, cfg in raw.items()
+                if stream_id in self.stream_ids
+            }
+            logger.info(f"Loaded ROI config for {len(self._configs)} stream(s) from {self.path}")
+        except Exception as e:
+            logger.error(f"Failed to load ROI config {self.path}: {e}")
+
+    def _save(self):
+        """Write the configs to disk without holding the lock used by live inference."""
+        if not self.path:
+            return
+        try:
+            with self._save_lock:
+                with self._lock:
+                    configs = dict(self._configs)
+                with open(self.path, 'w') as f:
+                    json.dump(configs, f, indent=2)
+        except Exception as e:
+            logger.error(f"Failed to save ROI config {self.path}: {e}")
+
+    def get(self, stream_id):
+        with self._lock:
+            return self._configs.get(stream_id)
+
+    def all(self):
+        with self._lock:
+            return dict(self._configs)
+
+    def set(self, stream_id, data):
+        if stream_id not in self.stream_ids:
+            raise ValueError(f"unknown stream {stream_id!r}; expected one of {sorted(self.stream_ids)}")
+        roi = parse_roi(data)
+        with self._lock:
+            self._configs[stream_id] = roi
+            self._plans = {k: v for k, v in self._plans.items() if k[0] != stream_id}
+        self._save()
+        return roi
+
+    def clear(self, stream_id):
+        with self._lock:
+            removed = self._configs.pop(stream_id, None) is not None
+            self._plans = {k: v for k, v in self._plans.items() if k[0] != stream_id}
+        if removed:
+            self._save()
+        return removed
+
+    def plan(self, stream_id, target_w, target_h):
+        """Cached RoiPlan for the stream, or None when it has no ROI configured."""
+        if stream_id is None:
+            return None
+        key = (stream_id, target_w, target_h)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                roi = self._configs.get(stream_id)
+                if roi is None:
+                    return None
+                plan = self._plans[key] = RoiPlan(roi, target_w, target_h)
+            return plan
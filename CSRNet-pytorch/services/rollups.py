@@ -0,0 +1,228 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# (bucket width in seconds, buckets kept per stream/session)
+ROLLUP_TIERS = (
+    (1, 3600),      # 1 hour
+    (10, 8640),     # 1 day
+    (60, 10080),    # 1 week
+    (600, 4320),    # 30 days
+)
+RISK_LEVELS = ("low", "medium", "high", "critical")
+# Gaps longer than this (e.g. stream outages) are not counted as time at a risk level
+MAX_SAMPLE_GAP_SECONDS = 5.0
+# Sessions idle this long keep only the coarsest tier
+ROLLUP_SESSION_IDLE_SECONDS = float(os.getenv('ROLLUP_SESSION_IDLE_HOURS', 6)) * 3600
+# Oldest (least recently updated) sessions beyond this are dropped entirely
+ROLLUP_MAX_SESSIONS = int(os.getenv('ROLLUP_MAX_SESSIONS', 500))
+COMPACT_INTERVAL_SECONDS = 60
+
+
+def _new_bucket(start):
+    return {
+        "start": start,
+        "samples": 0,
+        "peopleMin": None,
+        "peopleMax": None,
+        "peopleSum": 0.0,
+        "peakDensity": 0.0,
+        "riskSeconds": {level: 0.0 for level in RISK_LEVELS}
+    }
+
+
+def _merge_into(target, bucket):
+    if bucket["samples"]:
+        target["peopleMin"] = bucket["peopleMin"] if target["peopleMin"] is None else min(target["peopleMin"], bucket["peopleMin"])
+        target["peopleMax"] = bucket["peopleMax"] if target["peopleMax"] is None else max(target["peopleMax"], bucket["peopleMax"])
+    target["samples"] += bucket["samples"]
+    target["peopleSum"] += bucket["peopleSum"]
+    target["peakDensity"] = max(target["peakDensity"], bucket["peakDensity"])
+    for level, seconds in bucket["riskSeconds"].items():
+        target["riskSeconds"][level] += seconds
+
+
+def _public(bucket):
+    out = {k: v for k, v in bucket.items() if k != "peopleSum"}
+    out["peopleMean"] = bucket["peopleSum"] / bucket["samples"] if bucket["samples"] else None
+    out["riskSeconds"] = {k: round(v, 3) for k, v in bucket["riskSeconds"].items()}
+    return out
+
+
+class _Series:
+    """All rollup tiers for one stream or session."""
+
+    def __init__(self):
+        self.tiers = {width: OrderedDict() for width, _ in ROLLUP_TIERS}
+        self.first_ts = None
+        self.last_ts = None
+        self.last_level = None
+
+    def add(self, ts, people, peak, level):
+        # Time since the previous sample is attributed to the previous risk level
+        held = 0.0
+        if self.last_ts is not None and 0 < ts - self.last_ts <= MAX_SAMPLE_GAP_SECONDS:
+            held = ts - self.last_ts
+
+        for width, keep in ROLLUP_TIERS:
+            buckets = self.tiers[width]
+            start = math.floor(ts / width) * width
+            bucket = buckets.get(start)
+            if bucket is None:
+                bucket = buckets[start] = _new_bucket(start)
+                while len(buckets) > keep:
+                    buckets.popitem(last=False)
+            bucket["samples"] += 1
+            bucket["peopleSum"] += people
+            bucket["peopleMin"] = people if bucket["peopleMin"] is None else min(bucket["peopleMin"], people)
+            bucket["peopleMax"] = people if bucket["peopleMax"] is None else max(bucket["peopleMax"], people)
+            bucket["peakDensity"] = max(bucket["peakDensity"], peak)
+            if held:
+                bucket["riskSeconds"][self.last_level] += held
+
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = max(ts, self.last_ts or ts)
+        self.last_level = level
+
+    def oldest(self, width):
+        buckets = self.tiers[width]
+        return next(iter(buckets)) if buckets else None
+
+    def compact(self):
+        """Drop every tier except the coarsest."""
+        coarsest = ROLLUP_TIERS[-1][0]
+        for width, buckets in self.tiers.items():
+            if width != coarsest:
+                buckets.clear()
+
+
+class RollupStore:
+    """
+    Incrementally maintained multi-resolution summaries of analytics:update stats,
+    kept per stream and per session. record() is O(number of tiers); query() reads
+    the coarsest tier that still resolves the request, so long ranges never touch
+    per-frame data. Idle sessions are compacted to the coarsest tier and the
+    number of sessions is capped.
+    """
+
+    def __init__(self):
+        self._series = {}
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._last_compact = time.time()
+
+    def record(self, stream_id, session_id, stats, ts=None, per_stream=True):
+        """
+        Add one analytics sample. per_stream=False records it for the session
+        only (uploads, whose stream would just duplicate the session).
+        """
+        now = time.time()
+        ts = ts or now
+        people = float(stats.get("totalPeople", 0))
+        peak = float(stats.get("maxDensity", 0.0))
+        level = stats.get("globalRiskLevel", "low")
+        if level not in RISK_LEVELS:
+            level = "low"
+
+        with self._lock:
+            for key in (("stream", stream_id if per_stream else None), ("session", session_id)):
+                if key[1] is None:
+                    continue
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = _Series()
+                series.add(ts, people, peak, level)
+
+            if session_id is not None:
+                info = self._sessions.setdefault(session_id, {"sessionId": session_id, "streamId": stream_id, "startedAt": ts})
+                info["lastSampleAt"] = ts
+                info["updatedAt"] = now
+                info["compacted"] = False
+
+            if now - self._last_compact >= COMPACT_INTERVAL_SECONDS:
+                self._compact(now)
+                self._last_compact = now
+
+    def _compact(self, now):
+        # Caller holds self._lock
+        for session_id, info in self._sessions.items():
+            if not info["compacted"] and now - info["updatedAt"] > ROLLUP_SESSION_IDLE_SECONDS:
+                self._series[("session", session_id)].compact()
+                info["compacted"] = True
+
+        excess = len(self._sessions) - ROLLUP_MAX_SESSIONS
+        if excess > 0:
+            stale = sorted(self._sessions.values(), key=lambda i: i["updatedAt"])[:excess]
+            for info in stale:
+                del self._sessions[info["sessionId"]]
+                self._series.pop(("session", info["sessionId"]), None)
+
+    def pick_tier(self, series, start, resolution):
+        """Coarsest tier no wider than `resolution` whose retention still reaches `start`."""
+        widths = [width for width, _ in ROLLUP_TIERS]
+        usable = [w for w in widths if w <= resolution] or widths[:1]
+        reach = max(start, series.first_ts)
+        for width in reversed(usable):
+            oldest = series.oldest(width)
+            if oldest is not None and oldest <= reach:
+                return width
+        # Nothing that fine reaches back that far: favour range coverage over resolution
+        for width in widths[len(usable):]:
+            oldest = series.oldest(width)
+            if oldest is not None and oldest <= reach:
+                return width
+        return widths[-1]
+
+    def query(self, scope, scope_id, start=None, end=None, resolution=None):
+        """
+        Summaries for ('stream' | 'session', id) over [start, end) epoch seconds,
+        bucketed at `resolution` seconds (rounded up to a multiple of the tier width).
+        Defaults: the whole retained range at ~200 points.
+        """
+        with self._lock:
+            series = self._series.get((scope, scope_id))
+            if series is None:
+                return None
+
+            end = end if end is not None else series.last_ts + 1
+            start = start if start is not None else series.first_ts
+            if resolution is None:
+                resolution = max((end - start) / 200.0, 1)
+
+            width = self.pick_tier(series, start, resolution)
+            step = max(width, math.ceil(resolution / width) * width)
+
+            out = OrderedDict()
+            total = _new_bucket(start)
+            for bucket_start, bucket in series.tiers[width].items():
+                if bucket_start + width <= start or bucket_start >= end:
+                    continue
+                slot = math.floor(bucket_start / step) * step
+                target = out.get(slot)
+                if target is None:
+                    target = out[slot] = _new_bucket(slot)
+                _merge_into(target, bucket)
+                _merge_into(total, bucket)
+
+        return {
+            "scope": scope,
+            "id": scope_id,
+            "start": start,
+            "end": end,
+            "tierSeconds": width,
+            "resolutionSeconds": step,
+            "summary": _public(total),
+            "buckets": [_public(b) for b in out.values()]
+        }
+
+    def sessions(self):
+        """Known sessions with whole-session summaries from the coarsest tier."""
+        with self._lock:
+            sessions = [{k: v for k, v in info.items() if k != "updatedAt"} for info in self._sessions.values()]
+        for info in sessions:
+            result = self.query("session", info["sessionId"], resolution=ROLLUP_TIERS[-1][0])
+            info["summary"] = result["summary"] if result else None
+        return sessions
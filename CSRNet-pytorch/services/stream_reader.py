@@ -0,0 +1,130 @@
+import cv2
+import os
+import threading
+import time
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Demuxer/decoder options for the OpenCV FFmpeg backend ("key;value|key;value").
+# Small probe, no input buffering, low-delay decoding, no B-frame reorder queue.
+LOW_LATENCY_FFMPEG_OPTIONS = os.getenv(
+    'STREAM_FFMPEG_OPTIONS',
+    "fflags;nobuffer|flags;low_delay|probesize;32768|analyzeduration;0|max_delay;0|reorder_queue_size;0"
+)
+STREAM_OPEN_TIMEOUT_MS = int(os.getenv('STREAM_OPEN_TIMEOUT_MS', 3000))
+STREAM_READ_TIMEOUT_MS = int(os.getenv('STREAM_READ_TIMEOUT_MS', 3000))
+
+# Held around every VideoCapture open: OPENCV_FFMPEG_CAPTURE_OPTIONS is
+# process-wide, so no other open may run while it holds stream options
+_env_lock = threading.Lock()
+
+
+def open_capture(url, low_latency=True,
+                 open_timeout_ms=STREAM_OPEN_TIMEOUT_MS, read_timeout_ms=STREAM_READ_TIMEOUT_MS):
+    """
+    Open a network stream with cv2.VideoCapture.
+    In low-latency mode FFmpeg buffering is disabled and open/read timeouts are
+    bounded so a dead stream fails fast instead of blocking the reconnect loop.
+    """
+    options = LOW_LATENCY_FFMPEG_OPTIONS if low_latency else None
+    if options and url.startswith('rtsp://'):
+        options += "|rtsp_transport;tcp"
+
+    # OpenCV reads the options from the environment at open time
+    with _env_lock:
+        previous = os.environ.get('OPENCV_FFMPEG_CAPTURE_OPTIONS')
+        if options:
+            os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = options
+        try:
+            try:
+                cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG, [
+                    cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, open_timeout_ms,
+                    cv2.CAP_PROP_READ_TIMEOUT_MSEC, read_timeout_ms,
+                ])
+            except (TypeError, AttributeError):
+                # OpenCV < 4.5.2 has no open parameters
+                cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+        finally:
+            if options:
+                if previous is None:
+                    os.environ.pop('OPENCV_FFMPEG_CAPTURE_OPTIONS', None)
+                else:
+                    os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = previous
+
+    if low_latency and cap.isOpened():
+        # Keep at most one decoded frame queued inside the backend
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+def open_file_capture(path):
+    """
+    Open a local video with cv2.VideoCapture using FFmpeg's default options,
+    never the low-latency stream options set by a concurrent open_capture().
+    """
+    with _env_lock:
+        return cv2.VideoCapture(path)
+
+
+class LatencyTracker:
+    """
+    Tracks per-frame latency of the live pipeline.
+
+    - captureToEmit: wall time from cap.read() returning a frame to the
+      analytics:update emit for that frame (inference + serialisation).
+    - readerLag: how far the reader has fallen behind the stream clock since
+      the connection was opened, i.e. (wall - stream_ts) relative to the
+      smallest offset seen on this connection.
+    """
+
+    def __init__(self, window=300):
+        self._capture_to_emit = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._min_offset = None
+        self._last_reader_lag = None
+
+    def reset_connection(self):
+        """Call when the stream is (re)opened; stream timestamps restart."""
+        with self._lock:
+            self._min_offset = None
+            self._last_reader_lag = None
+
+    def on_capture(self, capture_ts, stream_ts_ms):
+        if stream_ts_ms is None or stream_ts_ms <= 0:
+            return
+        offset = capture_ts - stream_ts_ms / 1000.0
+        with self._lock:
+            if self._min_offset is None or offset < self._min_offset:
+                self._min_offset = offset
+            self._last_reader_lag = offset - self._min_offset
+
+    def on_emit(self, capture_ts, emit_ts=None):
+        latency = (emit_ts or time.time()) - capture_ts
+        with self._lock:
+            self._capture_to_emit.append(latency)
+        return latency
+
+    def summary(self):
+        with self._lock:
+            samples = sorted(self._capture_to_emit)
+            last = self._capture_to_emit[-1] if self._capture_to_emit else None
+            reader_lag = self._last_reader_lag
+        if not samples:
+            return {"captureToEmitMs": None, "readerLagMs": _ms(reader_lag), "samples": 0}
+        return {
+            "captureToEmitMs": {
+                "last": _ms(last),
+                "mean": _ms(sum(samples) / len(samples)),
+                "p50": _ms(samples[len(samples) // 2]),
+                "p95": _ms(samples[min(len(samples) - 1, int(len(samples) * 0.95))]),
+                "max": _ms(samples[-1])
+            },
+            "readerLagMs": _ms(reader_lag),
+            "samples": len(samples)
+        }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000.0, 1)